@@ -1,84 +1,276 @@
 import streamlit as st
 from datetime import datetime
-import json
+import orjson
+import csv
+import io
 import os
+from urllib.parse import urlsplit
 
-# database path
-DATABASE_FILE = os.path.join(os.getcwd(), "university_programs_database.json")
+# database paths: programs are appended one per line, everything else lives in the small meta file
+PROGRAMS_FILE = os.path.join(os.getcwd(), "university_programs.jsonl")
+META_FILE = os.path.join(os.getcwd(), "university_programs_meta.json")
+DATABASE_FILES = (PROGRAMS_FILE, META_FILE)
+
+# single-file format used before the split; only read to migrate, rewritten on the next save
+LEGACY_DATABASE_FILE = os.path.join(os.getcwd(), "university_programs_database.json")
+
+# fields the "Search programs" box matches against
+SEARCH_FIELDS = ('name', 'description', 'university', 'pricing')
+
+
+def _search_blob(program):
+    """Lowercased search text for a program, built once instead of per keystroke"""
+    # newline separator keeps a single-line search term from matching across fields
+    return '\n'.join(str(program.get(k, '')) for k in SEARCH_FIELDS).lower()
+
+
+def _index_database(database):
+    """Attach in-memory lookup indexes (never written to disk, rebuilt on load)"""
+    universities_by_url = {}
+    for uni in database.get('universities', []):
+        universities_by_url[uni.get('url', '')] = uni
+
+    for program in database.get('programs', []):
+        program['_search_blob'] = _search_blob(program)
+
+    database['_universities_by_url'] = universities_by_url
+    return database
+
+
+def _public(record):
+    """Drop in-memory only keys (those starting with an underscore)"""
+    return {k: v for k, v in record.items() if not k.startswith('_')}
+
+
+def serializable_database(database):
+    """Copy of the database in the single-file JSON layout, without the in-memory indexes"""
+    data = _public(database)
+    data['programs'] = [_public(p) for p in database.get('programs', [])]
+    return data
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _matching_indexes(_programs, needle, mtimes, count):
+    """Positions of programs whose search blob contains needle"""
+    return [i for i, p in enumerate(_programs) if needle in p['_search_blob']]
+
+
+def search_programs(database, search_term):
+    """Programs matching search_term (case-insensitive) in any of SEARCH_FIELDS"""
+    programs = database['programs']
+    needle = search_term.strip().lower()
+    if not needle:
+        return programs
+    return [programs[i] for i in _matching_indexes(programs, needle, _database_mtimes(), len(programs))]
+
+
+def programs_to_csv(programs):
+    """Render programs as CSV, one column per key in order of first appearance"""
+    fieldnames = list(dict.fromkeys(k for p in programs for k in p if not k.startswith('_')))
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(programs)
+    return buf.getvalue()
+
+
+# Cached readers take _database_mtimes() as an argument they never use: it only keys the cache, so
+# any save (which changes an mtime) makes the next call rebuild from disk. One entry is enough
+# because only the version currently on disk can ever be a hit.
+def _database_mtimes():
+    """Modification times of all database files (0 if missing)"""
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else 0
+                 for p in DATABASE_FILES + (LEGACY_DATABASE_FILE,))
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _load_cached(mtimes):
+    """Parse and index the database files"""
+    if not os.path.exists(META_FILE):
+        # legacy file: no _programs_on_disk, so the next save writes the new files in full
+        with open(LEGACY_DATABASE_FILE, 'rb') as f:
+            return _index_database(orjson.loads(f.read()))
+
+    with open(META_FILE, 'rb') as f:
+        database = orjson.loads(f.read())
+
+    # every append ends in a newline, so a final line without one is either a hand-edited last
+    # record (kept) or a torn write (dropped; size_on_disk marks where the intact data ends)
+    programs = []
+    size_on_disk = 0
+    dropped_torn_line = False
+    missing_newline = False
+    if os.path.exists(PROGRAMS_FILE):
+        with open(PROGRAMS_FILE, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    if line.strip():
+                        try:
+                            programs.append(orjson.loads(line))
+                            missing_newline = True
+                            size_on_disk += len(line)
+                        except orjson.JSONDecodeError:
+                            dropped_torn_line = True
+                    break
+                if line.strip():
+                    programs.append(orjson.loads(line))
+                size_on_disk += len(line)
+
+    database['programs'] = programs
+    database['total_programs'] = len(programs)
+    database['_programs_on_disk'] = len(programs)
+    database['_programs_size_on_disk'] = size_on_disk
+    database['_dropped_torn_line'] = dropped_torn_line
+    database['_programs_missing_newline'] = missing_newline
+    return _index_database(database)
+
+
+def _truncate_torn_line(size_on_disk):
+    """Cut the programs file back to size_on_disk if only a torn fragment follows it"""
+    # another session may have already truncated and appended complete (newline-ended) records
+    # since this database was loaded; those must be kept
+    with open(PROGRAMS_FILE, 'r+b') as f:
+        f.seek(size_on_disk)
+        if b'\n' not in f.read():
+            f.truncate(size_on_disk)
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _database_json(mtimes):
+    """Full database in the single-file JSON layout, as UTF-8 bytes"""
+    return orjson.dumps(serializable_database(_load_cached(mtimes)), option=orjson.OPT_INDENT_2)
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _programs_csv(mtimes):
+    """All programs as UTF-8 CSV bytes"""
+    return programs_to_csv(serializable_database(_load_cached(mtimes))['programs']).encode('utf-8')
+
+
+def export_database_json():
+    """Download payload for the full database, rebuilt only when the files change"""
+    return _database_json(_database_mtimes())
+
+
+def export_programs_csv():
+    """Download payload for all programs, rebuilt only when the files change"""
+    return _programs_csv(_database_mtimes())
 
 
 def load_database():
     """Load existing database or create empty one"""
-    if os.path.exists(DATABASE_FILE):
+    if os.path.exists(META_FILE) or os.path.exists(LEGACY_DATABASE_FILE):
         try:
-            with open(DATABASE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                st.sidebar.success(f"Database loaded from: {DATABASE_FILE}")
-                return data
+            # re-parses only when a file changed on disk (e.g. after save_database)
+            data = _load_cached(_database_mtimes())
+            source = PROGRAMS_FILE if '_programs_on_disk' in data else LEGACY_DATABASE_FILE
+            st.sidebar.success(f"Database loaded from: {source}")
+            if data.get('_dropped_torn_line'):
+                st.sidebar.warning(f"Ignored an incomplete last line in {PROGRAMS_FILE}")
+            return data
         except Exception as e:
             st.sidebar.error(f"Error loading database: {str(e)}")
-            return {"programs": [],
-                    "universities": [],
-                    "last_updated": None,
-                    "total_programs": 0}
+            # _load_failed stops save_database from overwriting the files that failed to load
+            return _index_database({"programs": [],
+                                    "universities": [],
+                                    "last_updated": None,
+                                    "total_programs": 0,
+                                    "_load_failed": True})
     else:
-        st.sidebar.info(f"New database will be created at: {DATABASE_FILE}")
-        return {"programs": [],
-                "universities": [],
-                "last_updated": None,
-                "total_programs": 0}
+        st.sidebar.info(f"New database will be created at: {PROGRAMS_FILE}")
+        return _index_database({"programs": [],
+                                "universities": [],
+                                "last_updated": None,
+                                "total_programs": 0})
 
 
 def save_database(database):
-    """Save database to file in current directory"""
+    """Save database to files in current directory, appending only programs not yet on disk"""
+    if database.get('_load_failed'):
+        st.error("Not saving: the database files failed to load and would be overwritten")
+        return False
+
     try:
-        with open(DATABASE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(database, f, indent=2, ensure_ascii=False)
-        st.success(f" Database saved to: {DATABASE_FILE}")
+        programs = database.get('programs', [])
+        on_disk = database.get('_programs_on_disk')
+
+        if on_disk is None or on_disk > len(programs):
+            # first save, migration from the legacy file, or a cleared database
+            mode, new_programs = 'wb', programs
+        else:
+            mode, new_programs = 'ab', programs[on_disk:]
+            # cut off a torn line left by an interrupted append before adding to the file
+            if database.get('_dropped_torn_line') and os.path.exists(PROGRAMS_FILE):
+                _truncate_torn_line(database['_programs_size_on_disk'])
+
+        with open(PROGRAMS_FILE, mode, buffering=64 * 1024) as f:
+            if mode == 'ab' and database.get('_programs_missing_newline'):
+                # terminate a hand-edited last record before appending after it
+                f.write(b'\n')
+            for program in new_programs:
+                f.write(orjson.dumps(_public(program)) + b'\n')
+
+        # orjson always emits UTF-8, so no ensure_ascii equivalent is needed.
+        # Encode the whole document first, then hand it to the file in one write()
+        meta = {k: v for k, v in _public(database).items() if k != 'programs'}
+        payload = orjson.dumps(meta, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        with open(META_FILE, 'wb', buffering=1024 * 1024) as f:
+            f.write(payload)
+
+        database['_programs_on_disk'] = len(programs)
+        database['_programs_size_on_disk'] = os.path.getsize(PROGRAMS_FILE)
+        database['_dropped_torn_line'] = False
+        database['_programs_missing_newline'] = False
+        st.success(f" Database saved to: {PROGRAMS_FILE}")
         return True
     except Exception as e:
-        st.error(f"Failed to save database to {DATABASE_FILE}: {str(e)}")
+        st.error(f"Failed to save database to {PROGRAMS_FILE}: {str(e)}")
         return False
 
 
-def add_programs_to_database(programs, university_url):
-    """Add new programs to the database"""
-    database = load_database()
+def add_programs_to_database(database, programs, university_url):
+    """Add new programs to an already loaded database"""
+    if '_universities_by_url' not in database:
+        _index_database(database)
+    universities_by_url = database['_universities_by_url']
+    all_programs = database['programs']
+    now_iso = datetime.now().isoformat()
+    base_len = len(all_programs)
 
     # Extract university name from URL
-    university_name = university_url.replace('https://', '').replace('http://', '').split('/')[0]
+    university_name = urlsplit(university_url).hostname or university_url.split('/')[0]
 
     # Check if university already exists
-    existing_urls = [uni.get('url', '') for uni in database.get('universities', [])]
+    uni = universities_by_url.get(university_url)
 
-    if university_url not in existing_urls:
+    if uni is None:
         # Add university info
         university_info = {
             "name": university_name,
             "url": university_url,
-            "scraped_at": datetime.now().isoformat(),
+            "scraped_at": now_iso,
             "programs_count": len(programs)
         }
         database['universities'].append(university_info)
+        universities_by_url[university_url] = university_info
     else:
         # Update existing university
-        for uni in database['universities']:
-            if uni.get('url') == university_url:
-                uni['scraped_at'] = datetime.now().isoformat()
-                uni['programs_count'] = uni.get('programs_count', 0) + len(programs)
+        uni['scraped_at'] = now_iso
+        uni['programs_count'] = uni.get('programs_count', 0) + len(programs)
 
-    # add programs with university info
-    for program in programs:
-        program_with_meta = program.copy()
-        program_with_meta['university'] = university_name
-        program_with_meta['source_url'] = university_url
-        program_with_meta['added_at'] = datetime.now().isoformat()
-        program_with_meta['id'] = f"{university_name}_{program.get('name', 'unknown')}_{len(database['programs'])}"
+    # add programs with university info (one timestamp for the whole batch)
+    for i, program in enumerate(programs, base_len):
+        program_with_meta = {**program,
+                             'university': university_name,
+                             'source_url': university_url,
+                             'added_at': now_iso,
+                             'id': f"{university_name}_{program.get('name', 'unknown')}_{i}"}
+        program_with_meta['_search_blob'] = _search_blob(program_with_meta)
 
-        database['programs'].append(program_with_meta)
+        all_programs.append(program_with_meta)
 
     # update metadata
-    database['last_updated'] = datetime.now().isoformat()
-    database['total_programs'] = len(database['programs'])
+    database['last_updated'] = now_iso
+    database['total_programs'] = len(all_programs)
 
     return database
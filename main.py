@@ -1,12 +1,13 @@
 import os
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-import openai
 import json
-import pandas as pd
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
 from datetime import datetime
-from database_handler import DATABASE_FILE, load_database, save_database, add_programs_to_database
+from database_handler import PROGRAMS_FILE, DATABASE_FILES, LEGACY_DATABASE_FILE, load_database, save_database, add_programs_to_database, \
+    programs_to_csv, export_database_json, export_programs_csv, search_programs
+import scrape_cache
 
 # page setup
 st.set_page_config(page_title="University Scraper", page_icon="🎓")
@@ -38,52 +39,169 @@ url = st.text_input("Enter University Website URL",
                     help="Paste the URL of the university summer programs page")
 
 
+OPENAI_MODEL = "gpt-4o-mini"
+MAX_HTML_BYTES = 512 * 1024
+MAX_HEADINGS = 40
+MAX_LINKS = 100
+MAX_SNIPPET_CHARS = 3000
+MAX_BATCH_WORKERS = 8
+
+
 # scraper
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so repeat scrapes of the same host reuse pooled connections"""
+    # imported lazily so a cold start only pays for it once the first scrape runs
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    # Add headers to avoid being blocked
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                      'Chrome/91.0.4472.124 Safari/537.36 '
+    })
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _clean(text):
+    """Collapse whitespace runs into single spaces"""
+    return ' '.join(text.split())
+
+
+def _download_page_summary(url):
+    """Fetch a page and summarise it"""
+    from bs4 import BeautifulSoup
+
+    # Only the first MAX_HTML_BYTES of the body are downloaded; the summary is a few KB anyway
+    response = get_http_session().get(url, timeout=10, stream=True)
+    try:
+        response.raise_for_status()
+        raw_html = response.raw.read(MAX_HTML_BYTES, decode_content=True)
+        # Links are resolved against the page actually served, after any redirects
+        final_url = response.url
+    finally:
+        response.close()
+
+    # bs4 setup
+    soup = BeautifulSoup(raw_html, 'lxml')
+
+    # Remove script and style elements (single pass over the tree)
+    for script in soup.find_all(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+
+    title = _clean(soup.title.get_text()) if soup.title else ''
+
+    headings = [_clean(h.get_text(' ')) for h in soup.find_all(['h1', 'h2', 'h3'], limit=MAX_HEADINGS)]
+
+    # Relative hrefs are resolved so the model can return usable program links
+    links = []
+    for a in soup.find_all('a', href=True, limit=MAX_LINKS):
+        text = _clean(a.get_text(' '))
+        href = a['href'].strip()
+        if text and not href.startswith(('#', 'javascript:', 'mailto:')):
+            links.append((text, urljoin(final_url, href)))
+
+    # Paragraph, list item and table/definition cell text until the budget is reached
+    body_snippets = []
+    remaining = MAX_SNIPPET_CHARS
+    collected = set()
+    for element in soup.find_all(['p', 'li', 'td', 'dd']):
+        # A collected element's text already includes everything nested in it
+        if any(id(parent) in collected for parent in element.parents):
+            continue
+        snippet = _clean(element.get_text(' '))[:remaining]
+        if not snippet:
+            continue
+        collected.add(id(element))
+        body_snippets.append(snippet)
+        remaining -= len(snippet)
+        if remaining <= 0:
+            break
+
+    # Pages built from bare divs have none of those tags, so fall back to all visible text
+    if not body_snippets:
+        text = _clean(' '.join(soup.stripped_strings))[:MAX_SNIPPET_CHARS]
+        if text:
+            body_snippets.append(text)
+
+    return {"title": title,
+            "headings": [h for h in headings if h],
+            "links": links,
+            "body_snippets": body_snippets}
+
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _fetch_page_summary(url):
+    """Page summary for url, cached per URL (errors propagate, so failures are not cached)"""
+    # an in-memory hit never reaches this body; on a miss the on-disk cache is tried before the network
+    summary = scrape_cache.load_scraped(url)
+    if summary is None:
+        summary = _download_page_summary(url)
+        scrape_cache.save_scraped(url, summary)
+    return summary
+
+
 def simple_scrape(url):
-    """Scraping with beautiful soup"""
+    """Scraping with beautiful soup; returns a dict with title, headings, links and body_snippets"""
     try:
-        # Add headers to avoid being blocked
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                          'Chrome/91.0.4472.124 Safari/537.36 '
-        }
+        return _fetch_page_summary(url)
+    except Exception as e:
+        st.error(f"Error scraping website: {str(e)}")
+        return None
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
 
-        # bs4 setup
-        soup = BeautifulSoup(response.content, 'html.parser')
+class _NoProgramsFound(Exception):
+    """Raised instead of returning [] so an empty extraction is never cached and can be retried"""
 
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
 
-        # Get text content
-        text_content = soup.get_text()
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _request_programs(_api_key, _prompt, cache_key, model):
+    """Run the extraction prompt, cached on scrape_cache.extraction_key(model, prompt)"""
+    # an in-memory hit never reaches this body; on a miss the on-disk cache is tried before the API
+    programs = scrape_cache.load_programs(cache_key)
+    if programs is not None:
+        return programs
 
-        # Clean up text
-        lines = (line.strip() for line in text_content.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        clean_text = ' '.join(chunk for chunk in chunks if chunk)
+    import openai
 
-        return clean_text[:15000]  # Limit to 15k characters
+    client = openai.OpenAI(api_key=_api_key)
 
-    except Exception as e:
-        st.error(f"Error scraping website: {str(e)}")
-        return None
+    # JSON mode makes the model return a single JSON object, so no code-fence stripping is needed
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system",
+                   "content": "Return a JSON object with key 'programs' whose value is an array."},
+                  {"role": "user", "content": _prompt}],
+        temperature=0,
+        response_format={"type": "json_object"},
+        max_tokens=1500,
+        stream=False
+    )
 
+    result = response.choices[0].message.content
+
+    # raises orjson.JSONDecodeError (not cached), e.g. on a reply cut off at max_tokens;
+    # the caller shows the raw text from e.doc
+    programs = orjson.loads(result).get('programs', [])
+    if not isinstance(programs, list) or not programs:
+        raise _NoProgramsFound()
+    scrape_cache.save_programs(cache_key, programs)
+    return programs
 
-def extract_programs_with_openai(content, url):
-    """Using OpenAI to extract program information"""
-    if not api_key:
-        st.error("Please enter your OpenAI API key in the sidebar")
-        return None
+
+def _extract_programs(content, url):
+    """Programs extracted from a simple_scrape summary; raises on API or JSON errors"""
+    content_json = orjson.dumps(content).decode('utf-8')
 
     prompt = f"""
 Extract computer science and programming summer programs from this university website content.
 
 Website URL: {url}
-Content: {content}
+Content (JSON with the page title, headings, links as [text, href] pairs and body text snippets): {content_json}
 
 Extract ONLY programs related to:
 - Computer Science
@@ -103,46 +221,43 @@ For each program found, return a JSON object with these exact fields (Compulsory
 - "pricing": Free (if not clearly stated, else state cost of enrolling on this summer school/bootcamp program"),
 - "link": Program URL (use the base URL if specific link not found)
 
-Return ONLY a valid JSON array. If no programs found, return [].
+Return ONLY a valid JSON object whose "programs" key holds the array. If no programs found, return {{"programs": []}}.
 
 Example format:
-[
-  {{
-    "university": "University of Energy and Natural Resources - Sunyani, Ghana",
-    "name": "Python Summer Bootcamp",
-    "description": "6-week intensive program teaching Python programming, web development with Django, and data analysis",
-    "eligibility": "High school students ages 16-18",
-    "duration": "6 weeks, June-July 2024",
-    "pricing
-    "link": "{url}"
-  }}
-]
+{{
+  "programs": [
+    {{
+      "university": "University of Energy and Natural Resources - Sunyani, Ghana",
+      "name": "Python Summer Bootcamp",
+      "description": "6-week intensive program teaching Python programming, web development with Django, and data analysis",
+      "eligibility": "High school students ages 16-18",
+      "duration": "6 weeks, June-July 2024",
+      "pricing": "Free",
+      "link": "{url}"
+    }}
+  ]
+}}
 """
 
     try:
-        client = openai.OpenAI(api_key=api_key)
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=2000
-        )
+        return _request_programs(api_key, prompt, scrape_cache.extraction_key(OPENAI_MODEL, prompt), OPENAI_MODEL)
+    except _NoProgramsFound:
+        return []
 
-        result = response.choices[0].message.content.strip()
 
-        if result.startswith('```json'):
-            result = result[7:-3]
-        elif result.startswith('```'):
-            result = result[3:-3]
+def extract_programs_with_openai(content, url):
+    """Using OpenAI to extract program information from a simple_scrape summary"""
+    if not api_key:
+        st.error("Please enter your OpenAI API key in the sidebar")
+        return None
 
+    try:
         # Try to parse JSON
         try:
-            programs = json.loads(result)
-            return programs if isinstance(programs, list) else []
-        except json.JSONDecodeError:
+            return _extract_programs(content, url)
+        except orjson.JSONDecodeError as e:
             st.error("Failed to parse AI response as JSON")
-            st.code(result)
+            st.code(e.doc)
             return []
 
     except Exception as e:
@@ -150,6 +265,11 @@ Example format:
         return None
 
 
+def _scrape_and_extract(url):
+    """Batch worker: runs off the script thread, so it raises instead of writing to the page"""
+    return _extract_programs(_fetch_page_summary(url), url)
+
+
 # main app logic
 if st.button("Scrape and Extract Programs", disabled=not url or not api_key):
     if url and api_key:
@@ -160,7 +280,7 @@ if st.button("Scrape and Extract Programs", disabled=not url or not api_key):
             st.success("Website scraped successfully!")
 
             with st.expander("View Scraped Content (Preview)"):
-                st.text_area("Content Preview", content[:1000] + "...", height=200)
+                st.json(content, expanded=False)
 
             with st.spinner("Extracting programs with AI..."):
                 programs = extract_programs_with_openai(content, url)
@@ -170,12 +290,12 @@ if st.button("Scrape and Extract Programs", disabled=not url or not api_key):
 
                 # auto-save to database
                 with st.spinner("Saving to database..."):
-                    updated_database = add_programs_to_database(programs, url)
+                    updated_database = add_programs_to_database(database, programs, url)
                     if save_database(updated_database):
                         st.success(f"Added {len(programs)} programs to database!")
                         st.info(
                             f"Database now contains {updated_database['total_programs']} total programs from {len(updated_database['universities'])} universities")
-                        st.info(f"Saved to: `{DATABASE_FILE}`")
+                        st.info(f"Saved to: `{PROGRAMS_FILE}`")
                     else:
                         st.error("Failed to save to database")
 
@@ -214,8 +334,7 @@ if st.button("Scrape and Extract Programs", disabled=not url or not api_key):
                 with col2:
                     # CSV download
                     if programs:
-                        df = pd.DataFrame(programs)
-                        csv_data = df.to_csv(index=False)
+                        csv_data = programs_to_csv(programs)
 
                         st.download_button(
                             label="-->Download CSV (Current)",
@@ -231,6 +350,45 @@ if st.button("Scrape and Extract Programs", disabled=not url or not api_key):
     else:
         st.warning("Please enter both a URL and OpenAI API key")
 
+# batch scraping
+with st.expander("Scrape Multiple URLs"):
+    batch_text = st.text_area("URLs (one per line)",
+                              placeholder="https://university.edu/summer-programs\nhttps://college.edu/cs-camps")
+    batch_urls = list(dict.fromkeys(line.strip() for line in batch_text.splitlines() if line.strip()))
+
+    if st.button("Scrape and Extract All", disabled=not batch_urls or not api_key):
+        results = {}
+        with st.spinner(f"Scraping and extracting {len(batch_urls)} URLs..."):
+            # each URL is an independent fetch + API call, so threads overlap the network latency
+            with ThreadPoolExecutor(max_workers=min(MAX_BATCH_WORKERS, len(batch_urls))) as executor:
+                futures = {executor.submit(_scrape_and_extract, batch_url): batch_url for batch_url in batch_urls}
+                for future in as_completed(futures):
+                    batch_url = futures[future]
+                    try:
+                        results[batch_url] = future.result()
+                    except Exception as e:
+                        st.error(f"Failed to process {batch_url}: {str(e)}")
+
+        # add everything in input order, then write the database once
+        batch_total = 0
+        for batch_url in batch_urls:
+            programs = results.get(batch_url)
+            if programs:
+                add_programs_to_database(database, programs, batch_url)
+                batch_total += len(programs)
+                st.success(f"{batch_url}: found {len(programs)} programs")
+            elif programs == []:
+                st.warning(f"{batch_url}: no computer science/programming programs found")
+
+        if batch_total:
+            with st.spinner("Saving to database..."):
+                if save_database(database):
+                    st.success(f"Added {batch_total} programs to database!")
+                    st.info(
+                        f"Database now contains {database['total_programs']} total programs from {len(database['universities'])} universities")
+                else:
+                    st.error("Failed to save to database")
+
 # Sidebar info
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Tips")
@@ -246,10 +404,11 @@ st.sidebar.markdown("---")
 st.sidebar.markdown("### File Location")
 current_dir = os.getcwd()
 st.sidebar.markdown(f"**Working Directory:** `{current_dir}`")
-st.sidebar.markdown(f"**Database File:** `{DATABASE_FILE}`")
+st.sidebar.markdown(f"**Database File:** `{PROGRAMS_FILE}`")
 
-if os.path.exists(DATABASE_FILE):
-    file_size = os.path.getsize(DATABASE_FILE)
+existing_files = [path for path in DATABASE_FILES if os.path.exists(path)]
+if existing_files:
+    file_size = sum(os.path.getsize(path) for path in existing_files)
     file_size_kb = file_size / 1024
     st.sidebar.markdown(f"**File Size:** {file_size_kb:.1f} KB")
 else:
@@ -273,20 +432,16 @@ col1, col2, col3 = st.columns(3)
 
 with col1:
     if st.button("View All Programs"):
-        database = load_database()
         if database['programs']:
             st.subheader(f"All Programs in Database ({len(database['programs'])})")
 
             # Add search/filter
-            search_term = st.text_input("Search programs:", placeholder="Enter keyword to filter programs")
+            search_term = st.text_input("Search programs:", placeholder="Enter keyword to filter programs",
+                                        key='search').strip()
 
             programs_to_show = database['programs']
             if search_term:
-                programs_to_show = [p for p in database['programs']
-                                    if search_term.lower() in p.get('name', '').lower()
-                                    or search_term.lower() in p.get('description', '').lower()
-                                    or search_term.lower() in p.get('university', '').lower()
-                                    or search_term.lower() in p.get("pricing", " ").lower()]
+                programs_to_show = search_programs(database, search_term)
                 st.info(f"Found {len(programs_to_show)} programs matching '{search_term}'")
 
             for i, program in enumerate(programs_to_show, 1):
@@ -305,7 +460,6 @@ with col1:
 
 with col2:
     if st.button("View Universities"):
-        database = load_database()
         if database.get('universities'):
             st.subheader("Scraped Universities")
             for uni in database['universities']:
@@ -319,25 +473,21 @@ with col2:
 
 with col3:
     if st.button("Export Database"):
-        database = load_database()
         if database['programs']:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
             # Full database JSON
             st.download_button(
                 label="Full Database (JSON)",
-                data=json.dumps(database, indent=2, ensure_ascii=False),
+                data=export_database_json(),
                 file_name=f"full_database_{timestamp}.json",
                 mime="application/json"
             )
 
             # programs only CSV
-            df = pd.DataFrame(database['programs'])
-            csv_data = df.to_csv(index=False)
-
             st.download_button(
                 label="All Programs (CSV)",
-                data=csv_data,
+                data=export_programs_csv(),
                 file_name=f"all_programs_{timestamp}.csv",
                 mime="text/csv"
             )
@@ -364,9 +514,11 @@ with st.expander("⚠ Attempt to terminate database"):
     with col2:
         if st.button("Reset & Start Fresh", type="secondary"):
             if st.checkbox("I want to start completely fresh"):
-                if os.path.exists(DATABASE_FILE):
-                    os.remove(DATABASE_FILE)
-                    st.success(f"Database file deleted from: {DATABASE_FILE}")
+                files_to_delete = [path for path in DATABASE_FILES + (LEGACY_DATABASE_FILE,) if os.path.exists(path)]
+                if files_to_delete:
+                    for path in files_to_delete:
+                        os.remove(path)
+                    st.success(f"Database files deleted: {', '.join(files_to_delete)}")
                     st.info("Refresh the page to start fresh.")
                     st.rerun()
                 else:
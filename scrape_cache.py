@@ -0,0 +1,71 @@
+import streamlit as st
+import hashlib
+import orjson
+import os
+import sqlite3
+import threading
+import time
+
+# on-disk cache of scraped page summaries (keyed by URL) and extracted programs (keyed by extraction_key)
+CACHE_FILE = os.path.join(os.getcwd(), "scrape_cache.db")
+CACHE_TTL_SECONDS = 24 * 3600
+
+# one connection is shared by every session thread, so access is serialised
+_lock = threading.Lock()
+
+
+@st.cache_resource
+def get_cache_conn():
+    """Open the cache database once per process"""
+    conn = sqlite3.connect(CACHE_FILE, check_same_thread=False)
+    conn.execute('CREATE TABLE IF NOT EXISTS pages(url TEXT PRIMARY KEY, scraped TEXT, ts REAL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS extractions(key TEXT PRIMARY KEY, programs TEXT, ts REAL)')
+    conn.commit()
+    return conn
+
+
+def extraction_key(model, prompt):
+    """Cache key for an extraction; the prompt already embeds the URL and page content"""
+    return hashlib.sha256(f"{model}\n{prompt}".encode('utf-8')).hexdigest()
+
+
+def _load(table, column, key_column, key):
+    """Parsed value stored for key if it was saved within the TTL, else None"""
+    with _lock:
+        row = get_cache_conn().execute(f'SELECT {column}, ts FROM {table} WHERE {key_column} = ?',
+                                       (key,)).fetchone()
+    if row is None or time.time() - row[1] > CACHE_TTL_SECONDS:
+        return None
+    return orjson.loads(row[0])
+
+
+def _save(table, key, value):
+    """Store value for key, stamped with the current time, and prune expired rows"""
+    now = time.time()
+    with _lock:
+        conn = get_cache_conn()
+        # rows are only ever added here, so pruning on save keeps the file bounded
+        conn.execute(f'DELETE FROM {table} WHERE ts < ?', (now - CACHE_TTL_SECONDS,))
+        conn.execute(f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)',
+                     (key, orjson.dumps(value).decode('utf-8'), now))
+        conn.commit()
+
+
+def load_scraped(url):
+    """Cached simple_scrape result for url, or None"""
+    return _load('pages', 'scraped', 'url', url)
+
+
+def save_scraped(url, scraped):
+    """Store a simple_scrape result for url"""
+    _save('pages', url, scraped)
+
+
+def load_programs(key):
+    """Cached extraction result for an extraction_key, or None"""
+    return _load('extractions', 'programs', 'key', key)
+
+
+def save_programs(key, programs):
+    """Store the programs extracted for an extraction_key"""
+    _save('extractions', key, programs)